@@ -1,11 +1,22 @@
+import asyncio
+import base64
+import calendar
 import os
 import json
 import hashlib
+import heapq
+import io
+import math
+import pickle
 import re
+import time
 from collections import defaultdict
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import urlparse
+from email.utils import parsedate_tz
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from xml.etree import ElementTree as ET
 
 import feedparser
 import httpx
@@ -25,11 +36,15 @@ LATAM_COUNTRIES = [
     "méxico", "brasil", "argentina", "chile", "colombia", "perú", "uruguay", "paraguay",
     "bolivia", "ecuador", "venezuela", "panamá", "costa rica", "guatemala", "honduras",
     "el salvador", "nicaragua", "república dominicana", "puerto rico",
-    # Abbreviations / common short forms
-    "mx", "br", "ar", "cl", "co", "pe", "uy", "py", "bo", "ec", "ve", "pa", "cr", "gt",
-    "hn", "sv", "ni", "do", "pr",
+    # Abbreviations / common short forms. Codes that are also everyday English or markup
+    # are left out even with word boundaries: do ("what you will do"), br (<br>),
+    # gt (&gt;), co (co-founder, Colorado), pa / ar (US states), pr, pe, py (Python), hn,
+    # ve ("you've", "we’ve"), ni (Spanish "ni"), cr (code / change request).
+    "mx", "cl", "uy", "bo", "ec", "sv",
 ]
 
+LATAM_REGIONS = ["latin america", "latam", "south america", "central america", "caribbean"]
+
 
 # ---------------- Time / formatting ----------------
 def now_ba() -> datetime:
@@ -44,30 +59,28 @@ def ru_time(dt: datetime) -> str:
     return dt.strftime("%H:%M")
 
 
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
 def html_escape(s: str) -> str:
-    s = s or ""
-    return (
-        s.replace("&", "&amp;")
-        .replace("<", "&lt;")
-        .replace(">", "&gt;")
-        .replace('"', "&quot;")
-    )
+    return (s or "").translate(_HTML_ESCAPE)
+
+
+TRACKING_PARAMS = frozenset({"ref", "source", "fbclid", "gclid"})
 
 
 def normalize_url(url: str) -> str:
     """Normalize and remove fragments and common tracking query params."""
     if not url:
         return url
-    url = url.strip().split("#", 1)[0]
-    # remove common tracking params (best-effort)
-    url = re.sub(
-        r"(\?|&)(utm_[^=]+|ref|source|fbclid|gclid)=[^&]+",
-        "",
-        url,
-        flags=re.I,
-    )
-    url = url.replace("?&", "?").rstrip("?&")
-    return url
+    parts = urlsplit(url.strip())
+    # remove common tracking params (utm_*, ref, source, fbclid, gclid)
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not (k.lower().startswith("utm_") or k.lower() in TRACKING_PARAMS)
+    ]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
 
 
 def strip_query(url: str) -> str:
@@ -77,84 +90,325 @@ def strip_query(url: str) -> str:
     return url.split("?", 1)[0]
 
 
-def sha(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+def digest_bytes(data: bytes) -> str:
+    """128-bit BLAKE2b hex digest: a dedup key, not a security boundary."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def digest(s: str) -> str:
+    return digest_bytes(s.encode("utf-8"))
+
 
+def compile_keywords(keywords: List[str]) -> Optional[re.Pattern]:
+    """
+    Build one alternation regex for a keyword set (longest first), so a text is
+    scanned once per set instead of once per keyword. None for an empty set.
+    """
+    kws = sorted({(k or "").lower() for k in keywords if k}, key=len, reverse=True)
+    if not kws:
+        return None
+    return re.compile("|".join(re.escape(k) for k in kws))
 
-def text_contains_any(text: str, keywords: List[str]) -> bool:
-    t = (text or "").lower()
-    return any((k or "").lower() in t for k in keywords)
+
+def text_contains_any(text: str, matcher: Optional[re.Pattern]) -> bool:
+    """`text` must already be lowercase, e.g. job["_text"]."""
+    if matcher is None:
+        return False
+    return matcher.search(text or "") is not None
 
 
 # ---------------- IO ----------------
 def load_config() -> Dict:
-    with open("jobs_sources.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open("jobs_sources.json", "rb") as f:
+        return json.loads(f.read())
 
 
 def load_state() -> Dict:
     if not os.path.exists("state.json"):
-        return {"published": []}
-    with open("state.json", "r", encoding="utf-8") as f:
-        st = json.load(f)
-    if "published" not in st or not isinstance(st["published"], list):
-        st["published"] = []
-    return st
+        return {}
+    with open("state.json", "rb") as f:
+        return json.loads(f.read())
 
 
 def save_state(st: Dict) -> None:
-    with open("state.json", "w", encoding="utf-8") as f:
-        json.dump(st, f, ensure_ascii=False, indent=2)
+    # compact, one write: nobody reads this file by hand
+    data = json.dumps(st, ensure_ascii=False, separators=(",", ":"))
+    # write-then-rename: a run killed mid-write never leaves a truncated state behind
+    with open("state.json.tmp", "wb") as f:
+        f.write(data.encode("utf-8"))
+    os.replace("state.json.tmp", "state.json")
+
+
+FEED_CACHE_DIR = os.path.join(".cache", "feeds")
+FEED_CACHE_MAX_AGE = 7 * 24 * 3600  # seconds since a cache file was last used
+FEED_CACHE_VERSION = 3  # bump whenever the job dict layout changes
+
+
+def _feed_cache_path(fid: str) -> str:
+    return os.path.join(FEED_CACHE_DIR, digest(fid) + ".pkl")
+
+
+def load_feed_cache(fid: str, body_hash: Optional[str]) -> Optional[List[Dict]]:
+    """Parsed jobs of an unchanged feed, or None if the cache is missing or stale."""
+    path = _feed_cache_path(fid)
+    if not body_hash or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            version, cached_hash, jobs = pickle.load(f)
+    except Exception:
+        return None
+    if version != FEED_CACHE_VERSION or cached_hash != body_hash:
+        return None
+    os.utime(path)  # mtime = last use, for pruning
+    return jobs
+
+
+def save_feed_cache(fid: str, body_hash: str, jobs: List[Dict]) -> None:
+    os.makedirs(FEED_CACHE_DIR, exist_ok=True)
+    with open(_feed_cache_path(fid), "wb") as f:
+        pickle.dump((FEED_CACHE_VERSION, body_hash, jobs), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def prune_feed_cache() -> None:
+    if not os.path.isdir(FEED_CACHE_DIR):
+        return
+    cutoff = time.time() - FEED_CACHE_MAX_AGE
+    for entry in os.scandir(FEED_CACHE_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
 
 
 # ---------------- RSS parsing ----------------
-def parse_entry_date(entry) -> Optional[datetime]:
-    for key in ("published_parsed", "updated_parsed"):
-        t = getattr(entry, key, None)
-        if t:
-            try:
-                return datetime(*t[:6], tzinfo=timezone.utc)
-            except Exception:
-                pass
-    return None
+# Entry dates are kept as UTC epoch seconds: they are only compared and sorted,
+# never displayed, so no datetime objects are built for them.
+def parse_entry_ts(entry) -> Optional[int]:
+    t = entry.get("published_parsed") or entry.get("updated_parsed")
+    if not t:
+        return None
+    try:
+        return calendar.timegm(t)  # feedparser structs are already UTC
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def parse_xml_ts(s: str) -> Optional[int]:
+    """RFC 822 (RSS pubDate) or ISO 8601 (Atom published/updated) -> UTC epoch seconds."""
+    s = (s or "").strip()
+    if not s:
+        return None
+    t = parsedate_tz(s)
+    if t:
+        # no zone in the string: treat as UTC
+        return calendar.timegm(t[:9]) - (t[9] or 0)
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def make_job(feed_id: str, title: str, link: str, summary: str, cats: List[str], ts: Optional[int]) -> Optional[Dict]:
+    raw_link = link or ""
+    title = " ".join((title or "").split())
+    link = normalize_url(raw_link)
+    summary = " ".join((summary or "").split())
+
+    # RSS categories/tags often contain geo; keep them in summary for filtering
+    if cats:
+        summary = (summary + " | categories: " + ", ".join(cats)).strip()
+
+    if not (title and link):
+        return None
+    return {
+        "title": title,
+        "link": link,
+        "summary": summary,
+        "ts": ts,
+        "source": feed_id,
+        # derived once here instead of at every filter / score / render step
+        "_norm_link": strip_query(link),
+        # legacy_job_key needs the link as the feed gave it, see there
+        "_raw_link": raw_link,
+        # the only lowercase copy: every matcher downstream reads this as-is
+        "_text": (title + " " + summary).lower(),
+    }
+
 
+def _local(tag) -> str:
+    # "{http://www.w3.org/2005/Atom}entry" -> "entry"
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
 
-def fetch_rss(feed_id: str, url: str) -> List[Dict]:
-    parsed = feedparser.parse(url)
+
+def parse_xml_entries(feed_id: str, content: bytes) -> List[Dict]:
+    """
+    Stream RSS <item> / Atom <entry> elements with the C-accelerated ElementTree parser.
+    Only the fields we use are read; each entry is detached from its parent as soon
+    as it is consumed, so the tree never holds more than the entry being read.
+    """
     out: List[Dict] = []
-    for e in getattr(parsed, "entries", []) or []:
-        title = re.sub(r"\s+", " ", (getattr(e, "title", "") or "").strip())
-        link = normalize_url(getattr(e, "link", "") or "")
-        summary = (getattr(e, "summary", "") or getattr(e, "description", "") or "").strip()
-        summary = re.sub(r"\s+", " ", summary)
+    parents: List[ET.Element] = []
+    for event, elem in ET.iterparse(io.BytesIO(content), events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if _local(elem.tag) not in ("item", "entry"):
+            continue
 
-        # RSS categories/tags often contain geo; keep them in summary for filtering
+        title, link, summary, content_text = "", "", "", ""
+        published, updated = "", ""
+        cats: List[str] = []
+        for child in elem:
+            name = _local(child.tag)
+            text = (child.text or "").strip()
+            if name == "title":
+                title = text
+            elif name == "link":
+                # RSS: <link>url</link>; Atom: <link rel="alternate" href="url"/>
+                href = child.get("href")
+                if href and child.get("rel", "alternate") == "alternate":
+                    link = link or href
+                elif text:
+                    link = link or text
+            elif name in ("description", "summary"):
+                summary = summary or text
+            elif name in ("encoded", "content"):
+                content_text = content_text or text
+            elif name == "category":
+                term = (child.get("term") or text).strip()
+                if term:
+                    cats.append(term)
+            elif name in ("pubDate", "published", "issued"):
+                published = published or text
+            elif name in ("updated", "modified", "date"):
+                updated = updated or text
+
+        ts = parse_xml_ts(published) or parse_xml_ts(updated)
+        job = make_job(feed_id, title, link, summary or content_text, cats, ts)
+        if job:
+            out.append(job)
+        # clear() alone would still leave an empty element per entry under <channel>
+        if parents:
+            parents[-1].remove(elem)
+    return out
+
+
+def parse_feedparser_entries(feed_id: str, content: bytes) -> List[Dict]:
+    """Lenient fallback for feeds that are not well-formed XML."""
+    parsed = feedparser.parse(content)
+    out: List[Dict] = []
+    for e in getattr(parsed, "entries", []) or []:
         cats = []
         for t in getattr(e, "tags", []) or []:
             term = (getattr(t, "term", "") or "").strip()
             if term:
                 cats.append(term)
-        if cats:
-            summary = (summary + " | categories: " + ", ".join(cats)).strip()
-
-        dt = parse_entry_date(e)
-        if title and link:
-            out.append(
-                {
-                    "title": title,
-                    "link": link,
-                    "summary": summary,
-                    "dt": dt,
-                    "source": feed_id,
-                }
-            )
+
+        job = make_job(
+            feed_id,
+            getattr(e, "title", "") or "",
+            getattr(e, "link", "") or "",
+            getattr(e, "summary", "") or getattr(e, "description", "") or "",
+            cats,
+            parse_entry_ts(e),
+        )
+        if job:
+            out.append(job)
     return out
 
 
-def within_lookback(dt: Optional[datetime], hours: int) -> bool:
-    if not dt:
+def feed_id(feed: Dict) -> str:
+    return feed.get("id") or feed.get("name") or "feed"
+
+
+def parse_feed(fid: str, content: bytes) -> List[Dict]:
+    try:
+        return parse_xml_entries(fid, content)
+    except ET.ParseError:
+        # stray HTML entities / broken markup are common in job feeds
+        return parse_feedparser_entries(fid, content)
+
+
+async def fetch_one(client: httpx.AsyncClient, feed: Dict, meta: Dict) -> Tuple[List[Dict], Dict]:
+    """
+    Conditional GET using the validators from the previous run. Returns (jobs, meta),
+    where meta holds the validators to send next time plus a hash of the body.
+    An unchanged feed (a 304, or a 200 with the same body) is not parsed again:
+    its jobs come from the on-disk parse cache.
+    """
+    fid = feed_id(feed)
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    r = await client.get(feed["url"], headers=headers)
+    if r.status_code == 304:
+        # unchanged since the last run: no body, nothing to parse
+        jobs = load_feed_cache(fid, meta.get("hash"))
+        if jobs is None:
+            # nothing cached to fall back on (first run with a cache, or it was evicted):
+            # retry once without validators; a server that still answers 304 gives nothing
+            if meta:
+                return await fetch_one(client, feed, {})
+            return [], {}
+        return jobs, meta
+    r.raise_for_status()
+
+    # many feeds ignore conditional requests but serve a byte-identical body
+    body_hash = digest_bytes(r.content)
+    new_meta = {"hash": body_hash}
+    if r.headers.get("etag"):
+        new_meta["etag"] = r.headers["etag"]
+    if r.headers.get("last-modified"):
+        new_meta["last_modified"] = r.headers["last-modified"]
+    # compared with the hash stored next to the cached parse, not meta["hash"]: the cache
+    # file always describes the last body fetched, even if that run's state was not saved
+    jobs = load_feed_cache(fid, body_hash)
+    if jobs is not None:
+        return jobs, new_meta
+
+    jobs = parse_feed(fid, r.content)
+    save_feed_cache(fid, body_hash, jobs)
+    return jobs, new_meta
+
+
+async def fetch_all(feeds: List[Dict], feed_meta: Dict[str, Dict], workers: int = 16) -> List:
+    """
+    Fetch all feeds on one event loop. A single HTTP/2 client keeps connections
+    (and TLS sessions) alive across feeds served by the same host; at most
+    `workers` feeds are in flight at once, the rest wait their turn.
+    Returns one entry per feed: a (jobs, meta) tuple or the exception it raised.
+    """
+    # a semaphore, not a connection limit: HTTP/2 multiplexes every request over one
+    # connection, and with HTTP/1.1 queued feeds would hit the pool timeout instead
+    slots = asyncio.Semaphore(max(1, workers))
+
+    async def fetch_limited(client: httpx.AsyncClient, feed: Dict) -> Tuple[List[Dict], Dict]:
+        async with slots:
+            return await fetch_one(client, feed, feed_meta.get(feed_id(feed), {}))
+
+    async with httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(30, pool=None),
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=32),
+    ) as client:
+        return await asyncio.gather(
+            *[fetch_limited(client, f) for f in feeds],
+            return_exceptions=True,
+        )
+
+
+def within_lookback(ts: Optional[int], cutoff: float) -> bool:
+    """`cutoff` is an epoch computed once per run; entries without a date always pass."""
+    if not ts:
         return True
-    return dt >= (datetime.now(timezone.utc) - timedelta(hours=hours))
+    return ts >= cutoff
 
 
 # ---------------- Dedup key ----------------
@@ -163,61 +417,232 @@ def job_key(job: Dict) -> str:
     Strong dedupe by link without query.
     This collapses duplicates where platforms add different tracking params.
     """
-    link = strip_query(normalize_url(job.get("link", "")))
-    return sha(link)
+    return digest(job["_norm_link"])
 
 
-# ---------------- Geo / LATAM gate ----------------
-def is_latam_job(text: str) -> bool:
-    t = (text or "").lower()
-    if "latin america" in t or "latam" in t:
-        return True
-    if "south america" in t or "central america" in t or "caribbean" in t:
-        return True
-    return any(country in t for country in LATAM_COUNTRIES)
+# normalize_url before the switch to urlsplit; kept verbatim for legacy_job_key only
+_RE_LEGACY_TRACKING = re.compile(r"(\?|&)(utm_[^=]+|ref|source|fbclid|gclid)=[^&]+", re.I)
+
+
+def _legacy_normalize_url(url: str) -> str:
+    if not url:
+        return url
+    url = url.strip().split("#", 1)[0]
+    url = _RE_LEGACY_TRACKING.sub("", url)
+    return url.replace("?&", "?").rstrip("?&")
+
+
+def legacy_job_key(job: Dict) -> str:
+    """
+    SHA-256 key used before the switch to BLAKE2b; only probed against the legacy filter.
+    Rebuilt from the raw link exactly as it used to be (normalized at fetch time and
+    again in job_key, then stripped of its query): the current normalize_url gives a
+    different link for e.g. "?utm_source=x&id=2" or an upper-case scheme.
+    """
+    link = strip_query(_legacy_normalize_url(_legacy_normalize_url(job["_raw_link"])))
+    return hashlib.sha256(link.encode("utf-8")).hexdigest()
+
 
+DEDUP_CAPACITY = 5000  # per generation: the last 5000..10000 published keys are remembered
+DEDUP_ERROR_RATE = 0.001
 
-def extract_latam_location(text: str) -> str:
-    t = (text or "").lower()
+
+class BloomFilter:
+    """
+    Fixed-size set of published job keys (false positive = a job is skipped).
+    Keys are hex digests, already uniformly distributed, so the k probe
+    positions come from two 64-bit slices of the key (Kirsch-Mitzenmacher:
+    h1 + i*h2 mod m) instead of k separate hashes.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.m = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.m + 7) // 8)
+        self.count = count
+
+    def _probes(self, key: str):
+        h1 = int(key[:16], 16)
+        h2 = int(key[16:32], 16) | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._probes(key))
+
+    def add(self, key: str) -> None:
+        for p in self._probes(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "bits": base64.b64encode(self.bits).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "BloomFilter":
+        return cls(
+            int(d["capacity"]),
+            float(d["error_rate"]),
+            bytearray(base64.b64decode(d["bits"])),
+            int(d.get("count", 0)),
+        )
+
+
+class RotatingBloomFilter:
+    """
+    Two Bloom filter generations, the fixed-size analogue of deque(maxlen=N):
+    once the current one holds `capacity` keys it becomes the previous one and a
+    fresh one starts. Old keys age out in insertion order. A lookup probes both
+    generations, so the effective false positive rate is up to about twice each
+    generation's error_rate (three times while main() also probes the legacy filter).
+    """
+
+    def __init__(self, current: BloomFilter, previous: Optional[BloomFilter] = None):
+        self.current = current
+        self.previous = previous
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    def add(self, key: str) -> None:
+        if self.current.count >= self.current.capacity:
+            self.previous = self.current
+            self.current = BloomFilter(self.current.capacity, self.current.error_rate)
+        self.current.add(key)
+
+
+KEY_HASH = "blake2b"
+
+
+def load_published(st: Dict) -> Tuple[RotatingBloomFilter, Optional[BloomFilter]]:
+    """
+    Returns (filter, legacy). legacy holds SHA-256 keys written before the switch
+    to BLAKE2b (an untagged filter or the old "published" list); it stays in
+    state.json, read-only, until the new filter has rotated once. By then
+    DEDUP_CAPACITY keys were published after it, so the old 5000-key list would
+    have forgotten them too. (Dropping it after the lookback window is not
+    enough: entries without a date pass the lookback check.)
+    """
+    bloom = st.get("bloom")
+    if bloom and bloom.get("hash") != KEY_HASH:
+        st["bloom_legacy"] = st.pop("bloom")
+        bloom = None
+    old_keys = st.pop("published", None) or []
+
+    legacy: Optional[BloomFilter] = None
+    legacy_d = st.get("bloom_legacy")
+    if legacy_d or old_keys:
+        legacy = (
+            BloomFilter.from_dict(legacy_d)
+            if legacy_d
+            else BloomFilter(max(DEDUP_CAPACITY, len(old_keys)), DEDUP_ERROR_RATE)
+        )
+        for key in old_keys:
+            legacy.add(key)
+
+    current = BloomFilter.from_dict(bloom) if bloom else BloomFilter(DEDUP_CAPACITY, DEDUP_ERROR_RATE)
+    prev = st.get("bloom_prev")
+    previous = BloomFilter.from_dict(prev) if prev and prev.get("hash") == KEY_HASH else None
+
+    # a migration always starts a fresh filter, so a previous generation means it has rotated
+    if legacy is not None and previous is not None:
+        st.pop("bloom_legacy", None)
+        legacy = None
+    elif legacy is not None:
+        st["bloom_legacy"] = legacy.to_dict()
+    return RotatingBloomFilter(current, previous), legacy
+
+
+def store_published(st: Dict, published: RotatingBloomFilter) -> None:
+    st["bloom"] = dict(published.current.to_dict(), hash=KEY_HASH)
+    if published.previous is not None:
+        st["bloom_prev"] = dict(published.previous.to_dict(), hash=KEY_HASH)
+
+
+# ---------------- Geo / LATAM gate ----------------
+# Full country names -> display name. Abbreviations only gate, they never label.
+LATAM_COUNTRY_NAMES = {
+    "mexico": "Mexico", "méxico": "Mexico",
+    "brazil": "Brazil", "brasil": "Brazil",
+    "argentina": "Argentina",
+    "chile": "Chile",
+    "colombia": "Colombia",
+    "peru": "Peru", "perú": "Peru",
+    "uruguay": "Uruguay",
+    "paraguay": "Paraguay",
+    "bolivia": "Bolivia",
+    "ecuador": "Ecuador",
+    "venezuela": "Venezuela",
+    "panama": "Panama", "panamá": "Panama",
+    "costa rica": "Costa Rica",
+    "guatemala": "Guatemala",
+    "honduras": "Honduras",
+    "el salvador": "El Salvador",
+    "nicaragua": "Nicaragua",
+    "dominican": "Dominican Republic", "dominican republic": "Dominican Republic",
+    "república dominicana": "Dominican Republic",
+    "puerto rico": "Puerto Rico",
+}
+
+# Word-bounded, longest first: one pass, and "mx" no longer matches inside "mxnetwork"
+_RE_LATAM_COUNTRY = re.compile(
+    r"\b("
+    + "|".join(re.escape(k) for k in sorted(set(LATAM_COUNTRIES), key=len, reverse=True))
+    + r")\b"
+)
+
+
+def latam_location(text: str, region_hit: bool) -> Optional[str]:
+    """
+    LATAM gate and location label from one pass over the country regex.
+    None: not a LATAM job. "—": LATAM, but no country named.
+    `text` must already be lowercase, e.g. job["_text"]; `region_hit` is the
+    classifier's word-bounded LATAM region flag for the same text.
+    """
+    t = text or ""
     if "latin america" in t or "latam" in t:
         return "LATAM"
 
-    mapping = [
-        ("mexico", "Mexico"),
-        ("brasil", "Brazil"),
-        ("brazil", "Brazil"),
-        ("argentina", "Argentina"),
-        ("chile", "Chile"),
-        ("colombia", "Colombia"),
-        ("peru", "Peru"),
-        ("uruguay", "Uruguay"),
-        ("paraguay", "Paraguay"),
-        ("bolivia", "Bolivia"),
-        ("ecuador", "Ecuador"),
-        ("venezuela", "Venezuela"),
-        ("panama", "Panama"),
-        ("costa rica", "Costa Rica"),
-        ("guatemala", "Guatemala"),
-        ("honduras", "Honduras"),
-        ("el salvador", "El Salvador"),
-        ("nicaragua", "Nicaragua"),
-        ("dominican republic", "Dominican Republic"),
-        ("puerto rico", "Puerto Rico"),
-    ]
-    for kw, name in mapping:
-        if kw in t:
+    hit = False
+    # first country mentioned by name wins
+    for m in _RE_LATAM_COUNTRY.finditer(t):
+        name = LATAM_COUNTRY_NAMES.get(m.group(1))
+        if name:
             return name
-    return "—"
+        hit = True
+
+    if hit or region_hit:
+        return "—"
+    return None
 
 
 # ---------------- Role / company parsing ----------------
+_RE_TRAILING_PARENS = re.compile(
+    r"\s+\((?:remote|work from anywhere|wfh|hybrid|on-site|onsite|.*?us.*?|.*?usa.*?|.*?united states.*?|.*?\d{4,}.*?)\)\s*$",
+    re.I,
+)
+_RE_ROLE_AT_COMPANY = re.compile(
+    r"^(?P<role>.+?)\s+\bat\s+(?P<company>[^—|-]{2,80})\s*(?:[—-].*)?$",
+    re.I,
+)
+_RE_COMPANY_COLON_ROLE = re.compile(r"^(?P<company>[^:]{2,80}):\s*(?P<role>.+)$")
+_RE_ROLE_DASH_COMPANY = re.compile(r"^(?P<role>.+?)\s+[—-]\s+(?P<company>[^()]{2,80}).*$")
+_RE_PAREN_TAIL = re.compile(r"\s+\(.*$")
+
+
 def clean_parens(s: str) -> str:
     """Remove repeated trailing parens fragments that often contain remote/geo noise."""
     s = (s or "").strip()
     # if title ends with many nested parens, keep first chunk
     # but do NOT delete important role words.
-    return re.sub(r"\s+\((?:remote|work from anywhere|wfh|hybrid|on-site|onsite|.*?us.*?|.*?usa.*?|.*?united states.*?|.*?\d{4,}.*?)\)\s*$",
-                  "", s, flags=re.I).strip()
+    return _RE_TRAILING_PARENS.sub("", s).strip()
 
 
 def split_role_company(title: str) -> Tuple[str, str]:
@@ -228,111 +653,136 @@ def split_role_company(title: str) -> Tuple[str, str]:
     t = clean_parens((title or "").strip())
 
     # "Role at Company"
-    m = re.match(
-        r"^(?P<role>.+?)\s+\bat\s+(?P<company>[^—|-]{2,80})\s*(?:[—-].*)?$",
-        t,
-        flags=re.I,
-    )
+    m = _RE_ROLE_AT_COMPANY.match(t)
     if m:
         role = m.group("role").strip()
         company = m.group("company").strip()
-        company = re.sub(r"\s+\(.*$", "", company).strip()
+        company = _RE_PAREN_TAIL.sub("", company).strip()
         return role, company
 
     # "Company: Role"
-    m = re.match(r"^(?P<company>[^:]{2,80}):\s*(?P<role>.+)$", t)
+    m = _RE_COMPANY_COLON_ROLE.match(t)
     if m:
         company = m.group("company").strip()
         role = m.group("role").strip()
         return role, company
 
     # "Role — Company" or "Role - Company"
-    m = re.match(r"^(?P<role>.+?)\s+[—-]\s+(?P<company>[^()]{2,80}).*$", t)
+    m = _RE_ROLE_DASH_COMPANY.match(t)
     if m:
         role = m.group("role").strip()
         company = m.group("company").strip()
-        company = re.sub(r"\s+\(.*$", "", company).strip()
+        company = _RE_PAREN_TAIL.sub("", company).strip()
         return role, company
 
     return t, "—"
 
 
 # ---------------- Track / seniority ----------------
-def infer_seniority(text: str) -> str:
-    t = (text or "").lower()
-
+# Checked in priority order: the first label with any hit wins.
+SENIORITY_KEYWORDS: List[Tuple[str, List[str]]] = [
     # strict word boundaries: avoid matching "coo" inside "coordinator"
-    if re.search(r"\b(ceo|cto|cpo|cfo|coo)\b", t) or re.search(r"\b(vp|vice president)\b", t):
-        return "C-level/VP"
-
-    if re.search(r"\b(head|director)\b", t):
-        return "Head/Director"
-
-    if re.search(r"\b(lead|principal|staff)\b", t):
-        return "Lead"
-
-    if re.search(r"\b(senior|sr)\b", t):
-        return "Senior"
+    ("C-level/VP", ["ceo", "cto", "cpo", "cfo", "coo", "vp", "vice president"]),
+    ("Head/Director", ["head", "director"]),
+    ("Lead", ["lead", "principal", "staff"]),
+    ("Senior", ["senior", "sr"]),
+    ("Middle", ["mid", "middle", "mid-level", "pleno"]),
+    ("Junior", ["junior", "jr", "entry level", "entry-level", "intern", "internship"]),
+]
 
-    if re.search(r"\b(mid|middle|mid-level|pleno)\b", t):
-        return "Middle"
+TRACK_KEYWORDS: List[Tuple[str, List[str]]] = [
+    # Design: only real design signals (avoid "workflow design")
+    ("Design", ["designer", "ux", "ui", "product designer", "ux researcher", "ui designer",
+                "visual designer", "graphic designer"]),
+    ("Product", ["product manager", "product owner", "product lead", "growth product",
+                 "product ops", "product operations"]),
+    ("Project", ["project manager", "program manager", "scrum master", "pmo", "delivery manager",
+                 "implementation manager"]),
+    ("Data/AI", ["data scientist", "data engineer", "data analyst", "research analyst", "analyst",
+                 "analytics", "business intelligence", "bi",
+                 "machine learning", "ml engineer", "ai engineer", "ai"]),
+    ("DevOps/Sec", ["devops", "sre", "site reliability", "platform engineer", "cloud engineer",
+                    "kubernetes", "secops", "security engineer"]),
+    ("Engineering", ["engineer", "developer", "software engineer", "backend", "frontend", "fullstack",
+                     "full stack", "php", "python", "java", "golang", "node", "react", "servicenow",
+                     "clojure"]),
+    # Events: strict word boundaries
+    ("Events", ["event manager", "event coordinator", "event", "events"]),
+    ("Support/Ops", ["customer support", "support", "customer success", "operations", "ops",
+                     "contact center"]),
+]
 
-    if re.search(r"\b(junior|jr|entry level|entry-level|intern|internship)\b", t):
-        return "Junior"
+# score() bonus for senior-and-up wording
+SENIOR_PLUS_KEYWORDS = ["senior", "lead", "staff", "principal", "head", "director"]
 
-    return "—"
+REGION_LABEL = "LATAM"
+SENIOR_PLUS_LABEL = "senior+"
 
 
-def infer_track(text: str) -> str:
-    t = (text or "").lower()
+class Classification(NamedTuple):
+    track: str
+    seniority: str
+    latam: bool  # explicit region mention: LATAM / Latin, South, Central America / Caribbean
+    senior_plus: bool
 
-    # Design: only real design signals (avoid "workflow design")
-    if re.search(r"\b(designer|ux|ui|product designer|ux researcher|ui designer|visual designer|graphic designer)\b", t):
-        return "Design"
 
-    # Product
-    if re.search(r"\b(product manager|product owner|product lead|growth product|product ops|product operations)\b", t):
-        return "Product"
+def _build_classifier() -> Tuple[re.Pattern, Dict[str, frozenset]]:
+    """
+    One word-bounded alternation over every seniority / track / region keyword.
+    Each keyword maps to the labels it implies, including those of shorter keywords
+    nested in it ("product lead" -> Product + Lead), so non-overlapping matches
+    lose nothing compared to running each category regex separately.
+    """
+    labels: Dict[str, set] = defaultdict(set)
+    for label, kws in SENIORITY_KEYWORDS + TRACK_KEYWORDS:
+        for kw in kws:
+            labels[kw].add(label)
+    for kw in LATAM_REGIONS:
+        labels[kw].add(REGION_LABEL)
+    for kw in SENIOR_PLUS_KEYWORDS:
+        labels[kw].add(SENIOR_PLUS_LABEL)
 
-    # Project / Program
-    if re.search(r"\b(project manager|program manager|scrum master|pmo|delivery manager|implementation manager)\b", t):
-        return "Project"
+    words = sorted(labels, key=len, reverse=True)
+    for outer in words:
+        for inner in words:
+            if inner != outer and re.search(r"\b" + re.escape(inner) + r"\b", outer):
+                labels[outer] |= labels[inner]
 
-    # Data/AI
-    if re.search(r"\b(data scientist|data engineer|data analyst|research analyst|analyst|analytics|business intelligence|bi)\b", t):
-        return "Data/AI"
-    if re.search(r"\b(machine learning|ml engineer|ai engineer|ai)\b", t):
-        return "Data/AI"
+    pattern = re.compile(r"\b(" + "|".join(re.escape(w) for w in words) + r")\b")
+    return pattern, {w: frozenset(ls) for w, ls in labels.items()}
 
-    # DevOps/Sec
-    if re.search(r"\b(devops|sre|site reliability|platform engineer|cloud engineer|kubernetes|secops|security engineer)\b", t):
-        return "DevOps/Sec"
 
-    # Engineering
-    if re.search(r"\b(engineer|developer|software engineer|backend|frontend|fullstack|full stack|php|python|java|golang|node|react|servicenow|clojure)\b", t):
-        return "Engineering"
+_RE_CLASSIFY, _CLASSIFY_LABELS = _build_classifier()
 
-    # Events: strict word boundaries
-    if re.search(r"\b(event manager|event coordinator)\b", t) or re.search(r"\b(event|events)\b", t):
-        return "Events"
 
-    # Support/Ops
-    if re.search(r"\b(customer support|support|customer success|operations|ops|contact center)\b", t):
-        return "Support/Ops"
+# cross-posted jobs (same text, different board links) are only classified once
+@lru_cache(maxsize=2048)
+def classify(text: str) -> Classification:
+    """
+    Single pass over the text for track, seniority, LATAM region and senior+ hits.
+    `text` must already be lowercase, e.g. job["_text"].
+    """
+    hits: set = set()
+    for m in _RE_CLASSIFY.finditer(text or ""):
+        hits |= _CLASSIFY_LABELS[m.group(1)]
 
-    return "Other"
+    track = next((label for label, _ in TRACK_KEYWORDS if label in hits), "Other")
+    seniority = next((label for label, _ in SENIORITY_KEYWORDS if label in hits), "—")
+    return Classification(track, seniority, REGION_LABEL in hits, SENIOR_PLUS_LABEL in hits)
 
 
-def score(job: Dict, filters: Dict) -> int:
-    text = (job["title"] + " " + (job.get("summary") or "")).lower()
+def score(job: Dict, remote_kw: Optional[re.Pattern], c: Classification, loc: str) -> int:
+    """`loc` is latam_location() of the same text; its answer is reused where it is decisive."""
+    text = job["_text"]
     s = 0
-    if "latam" in text or "latin america" in text:
+    if loc == "LATAM":
         s += 4
-    if any(c in text for c in LATAM_COUNTRIES):
+    # a named country is already a country hit; "LATAM" / "—" say nothing either way
+    if loc not in ("LATAM", "—") or _RE_LATAM_COUNTRY.search(text):
         s += 2
-    if text_contains_any(text, filters.get("remote_keywords", [])):
+    if text_contains_any(text, remote_kw):
         s += 1
-    if re.search(r"\b(senior|lead|staff|principal|head|director)\b", text, flags=re.I):
+    if c.senior_plus:
         s += 1
     return s
 
@@ -367,8 +817,7 @@ def build_post(jobs: List[Dict], cfg: Dict) -> str:
     # Group by track
     sections: Dict[str, List[Dict]] = defaultdict(list)
     for j in jobs:
-        full_text = (j["title"] + " " + (j.get("summary") or "")).strip()
-        sections[infer_track(full_text)].append(j)
+        sections[j["_track"]].append(j)
 
     order = ["Design", "Product", "Project", "Events", "Engineering", "Data/AI", "DevOps/Sec", "Support/Ops", "Other"]
     track_emoji = {
@@ -383,9 +832,9 @@ def build_post(jobs: List[Dict], cfg: Dict) -> str:
         "Other": "📌",
     }
 
-    out: List[str] = []
+    out = io.StringIO()
     # ONLY title in header (no time line, no "N jobs..." line)
-    out.append(f"<b>{html_escape(title)}</b>\n")
+    out.write(f"<b>{html_escape(title)}</b>\n")
 
     idx = 1
     for track in order:
@@ -393,39 +842,25 @@ def build_post(jobs: List[Dict], cfg: Dict) -> str:
         if not items:
             continue
 
-        out.append(f"\n<b>{track_emoji.get(track,'📌')} {html_escape(track)} ({len(items)})</b>\n")
+        out.write(f"\n<b>{track_emoji.get(track,'📌')} {html_escape(track)} ({len(items)})</b>\n")
 
         for j in items:
-            full_text = (j["title"] + " " + (j.get("summary") or "")).strip()
-
-            role, company = split_role_company(j["title"] or "")
-            loc = extract_latam_location(full_text)
-            grade = infer_seniority(full_text)
-
-            meta_parts = []
-            if loc != "—":
-                meta_parts.append(loc)
-            if grade != "—":
-                meta_parts.append(grade)
-
-            meta = " · ".join(meta_parts)
+            # each field is escaped exactly once, and the whole line is one f-string
+            company = j["_company"]
+            company_str = f" — {html_escape(company)}" if company != "—" else ""
+            meta = " · ".join(p for p in (j["_loc"], j["_grade"]) if p != "—")
             meta_str = f" <i>[{html_escape(meta)}]</i>" if meta else ""
 
-            link = strip_query(normalize_url(j["link"]))
-            apply = f'<a href="{html_escape(link)}">Apply</a>'
-
-            if company != "—":
-                line_left = f"{idx}) <b>{html_escape(role)}</b> — {html_escape(company)}{meta_str}"
-            else:
-                line_left = f"{idx}) <b>{html_escape(role)}</b>{meta_str}"
-
-            out.append(f"{line_left} · {apply}\n")
+            out.write(
+                f"{idx}) <b>{html_escape(j['_role'])}</b>{company_str}{meta_str}"
+                f' · <a href="{html_escape(j["_norm_link"])}">Apply</a>\n'
+            )
             idx += 1
 
     footer = cfg.get("formatting", {}).get("footer_tags", ["#jobs", "#remote", "#latam"])
-    out.append("\n" + " ".join(footer))
+    out.write("\n" + " ".join(footer))
 
-    return "".join(out).strip()
+    return out.getvalue().strip()
 
 
 # ---------------- Main ----------------
@@ -440,69 +875,113 @@ def main() -> None:
     max_items = int(meta.get("max_items_per_digest", 8))
     min_items = int(meta.get("min_items_per_digest", 3))
     lookback = int(meta.get("lookback_hours", 72))
+    fetch_workers = int(meta.get("fetch_workers", 16))
+
+    published, legacy = load_published(st)
+
+    enabled = [
+        f for f in feeds
+        if f.get("enabled", True) and f.get("type") == "rss" and f.get("url")
+    ]
 
-    published = set(st.get("published", []))
+    # per-feed ETag / Last-Modified, persisted with the rest of the state
+    feed_meta: Dict[str, Dict] = st.get("feed_meta", {})
 
     collected: List[Dict] = []
-    for f in feeds:
-        if not f.get("enabled", True):
-            continue
-        if f.get("type") != "rss":
-            continue
-        fid = f.get("id") or f.get("name") or "feed"
-        url = f.get("url")
-        if not url:
-            continue
-        try:
-            collected.extend(fetch_rss(fid, url))
-        except Exception as e:
-            print(f"[WARN] feed {fid} failed: {e}")
+    if enabled:
+        results = asyncio.run(fetch_all(enabled, feed_meta, fetch_workers))
+        for f, res in zip(enabled, results):
+            if isinstance(res, Exception):
+                print(f"[WARN] feed {feed_id(f)} failed: {res}")
+                continue
+            jobs, fmeta = res
+            collected.extend(jobs)
+            if fmeta:
+                feed_meta[feed_id(f)] = fmeta
+            else:
+                feed_meta.pop(feed_id(f), None)
+        prune_feed_cache()
 
+    # validators have to be saved even when nothing is posted: the parse cache on
+    # disk already holds the bodies they describe
+    st["feed_meta"] = feed_meta
+
+    # keyword sets are compiled once per run, not re-scanned per keyword per job
+    include_kw = compile_keywords(filters.get("include_keywords", []))
+    exclude_kw = compile_keywords(filters.get("exclude_keywords", []))
+    remote_kw = compile_keywords(filters.get("remote_keywords", []))
+
+    # filters run cheapest first; each counter is the number of entries it rejected
+    dropped: Dict[str, int] = defaultdict(int)
     fresh: List[Tuple[int, Dict, str]] = []
+    seen_links = set()
+    cutoff = time.time() - lookback * 3600
     for j in collected:
-        if not within_lookback(j.get("dt"), lookback):
+        if not within_lookback(j.get("ts"), cutoff):
+            dropped["old"] += 1
             continue
 
-        full_text = (j["title"] + " " + (j.get("summary") or "")).lower()
+        # the same posting often comes from several feeds (e.g. "All" + a category):
+        # keep the first copy, before any filtering or hashing is spent on the rest
+        if j["_norm_link"] in seen_links:
+            dropped["duplicate"] += 1
+            continue
+        seen_links.add(j["_norm_link"])
 
-        inc = filters.get("include_keywords", [])
-        exc = filters.get("exclude_keywords", [])
+        full_text = j["_text"]
 
-        if inc and not text_contains_any(full_text, inc):
+        if include_kw and not text_contains_any(full_text, include_kw):
+            dropped["include"] += 1
             continue
-        if exc and text_contains_any(full_text, exc):
+        if text_contains_any(full_text, exclude_kw):
+            dropped["exclude"] += 1
             continue
 
+        c = classify(full_text)
+
         # Strict LATAM-only
-        if not is_latam_job(full_text):
+        loc = latam_location(full_text, c.latam)
+        if loc is None:
+            dropped["not_latam"] += 1
             continue
 
+        # hashed last: only candidates that passed every filter need a key
         key = job_key(j)
-        if key in published:
+        if key in published or (legacy and legacy_job_key(j) in legacy):
+            dropped["published"] += 1
             continue
 
-        fresh.append((score(j, filters), j, key))
+        fresh.append((score(j, remote_kw, c, loc), j, key))
+
+        # everything build_post renders, derived once from the same pass
+        j["_track"], j["_grade"] = c.track, c.seniority
+        j["_role"], j["_company"] = split_role_company(j["title"])
+        j["_loc"] = loc
+
+    print(
+        f"[INFO] {len(collected)} entries, {len(fresh)} candidates; dropped: "
+        + (", ".join(f"{k}={v}" for k, v in dropped.items()) or "none")
+    )
 
     if not fresh:
         print("[INFO] no new LATAM jobs")
+        save_state(st)
         return
 
-    fresh.sort(
+    # only the top max_items are needed: O(N log K) instead of sorting every candidate
+    top = heapq.nlargest(
+        max_items,
+        fresh,
         key=lambda x: (
             x[0],
-            x[1]["dt"].timestamp() if x[1].get("dt") else 0,
+            x[1].get("ts") or 0,
         ),
-        reverse=True,
     )
-
-    chosen: List[Tuple[Dict, str]] = []
-    for _, j, key in fresh:
-        chosen.append((j, key))
-        if len(chosen) >= max_items:
-            break
+    chosen: List[Tuple[Dict, str]] = [(j, key) for _, j, key in top]
 
     if len(chosen) < min_items:
         print("[INFO] below min items, skip post")
+        save_state(st)
         return
 
     jobs = [j for j, _ in chosen]
@@ -512,8 +991,7 @@ def main() -> None:
     for _, key in chosen:
         published.add(key)
 
-    # keep last N published keys
-    st["published"] = list(published)[-5000:]
+    store_published(st, published)
     save_state(st)
 
 